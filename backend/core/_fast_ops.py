@@ -0,0 +1,68 @@
+"""
+可选的numba加速核
+numba缺失时本模块仍可正常导入,调用方通过HAS_NUMBA选择是否走加速路径
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def median3(src, out):
+        """
+        3x3中值滤波的并行实现
+
+        每个像素的9邻域通过固定的20次比较交换排序网络取中值,
+        无分支、无邻域数组分配,按行并行;边界一像素直接拷贝。
+        结果写入调用方提供的out缓冲区(形状与src一致)并返回
+        """
+        h, w = src.shape
+
+        for j in range(w):
+            out[0, j] = src[0, j]
+            out[h - 1, j] = src[h - 1, j]
+
+        for i in prange(1, h - 1):
+            out[i, 0] = src[i, 0]
+            out[i, w - 1] = src[i, w - 1]
+            for j in range(1, w - 1):
+                p0 = src[i - 1, j - 1]
+                p1 = src[i - 1, j]
+                p2 = src[i - 1, j + 1]
+                p3 = src[i, j - 1]
+                p4 = src[i, j]
+                p5 = src[i, j + 1]
+                p6 = src[i + 1, j - 1]
+                p7 = src[i + 1, j]
+                p8 = src[i + 1, j + 1]
+
+                # 中值排序网络(McGuire的median-of-9),完成后中值位于p4
+                p0, p3 = min(p0, p3), max(p0, p3)
+                p1, p4 = min(p1, p4), max(p1, p4)
+                p2, p5 = min(p2, p5), max(p2, p5)
+                p0, p1 = min(p0, p1), max(p0, p1)
+                p0, p2 = min(p0, p2), max(p0, p2)
+                p4, p5 = min(p4, p5), max(p4, p5)
+                p3, p5 = min(p3, p5), max(p3, p5)
+                p1, p2 = min(p1, p2), max(p1, p2)
+                p3, p4 = min(p3, p4), max(p3, p4)
+                p1, p3 = min(p1, p3), max(p1, p3)
+                p1, p6 = min(p1, p6), max(p1, p6)
+                p4, p6 = min(p4, p6), max(p4, p6)
+                p2, p6 = min(p2, p6), max(p2, p6)
+                p2, p3 = min(p2, p3), max(p2, p3)
+                p4, p7 = min(p4, p7), max(p4, p7)
+                p2, p4 = min(p2, p4), max(p2, p4)
+                p3, p7 = min(p3, p7), max(p3, p7)
+                p4, p8 = min(p4, p8), max(p4, p8)
+                p3, p8 = min(p3, p8), max(p3, p8)
+                p3, p4 = min(p3, p4), max(p3, p4)
+
+                out[i, j] = p4
+
+        return out
@@ -2,22 +2,44 @@
 AI识别引擎
 使用OpenAI兼容的API进行图像识别
 """
-import base64
+import asyncio
 import json
-import requests
+import re
+import importlib.util
+import httpx
 from typing import Dict, Any, List, Optional
 from loguru import logger
 import cv2
 import numpy as np
 
+# HTTP/2多路复用需要h2包(httpx[http2]),未安装时自动退回HTTP/1.1
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# PyTurboJPEG为可选加速依赖:libjpeg-turbo的SIMD编码比OpenCV默认路径快数倍,
+# 未安装(或本地缺少libturbojpeg)时退回cv2.imencode
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    _TURBO_JPEG = TurboJPEG()
+except Exception:
+    _TURBO_JPEG = None
+
+# pybase64为可选加速依赖:SIMD(SSSE3/AVX2)编码,对数MB的JPEG缓冲区比标准库快数倍
+try:
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 
 class AIRecognizer:
     """AI识别引擎"""
-    
+
+    # 提取```json ... ```代码块的正则,单次扫描替代多次str.split拷贝
+    _FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
+
     def __init__(self, config: Dict[str, Any]):
         """
         初始化AI识别器
-        
+
         Args:
             config: AI配置字典
         """
@@ -26,48 +48,138 @@ class AIRecognizer:
         self.providers = {p['id']: p for p in config.get('providers', [])}
         self.models = {m['id']: m for m in config.get('models', [])}
         self.active_model_id = config.get('active_model_id')
-        
-        logger.info(f"AIRecognizer initialized, enabled={self.enabled}, active_model={self.active_model_id}")
+
+        # 配置只在初始化/更新时变化,激活的(model, provider)与API地址预先解析
+        self._resolve()
+
+        # 持久化HTTP客户端:连接池复用TCP/TLS连接,支持HTTP/2多路复用
+        self._client = httpx.Client(
+            http2=_HTTP2_AVAILABLE,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+        )
+        # 异步客户端按需创建(批量识别时使用)
+        self._aclient: Optional[httpx.AsyncClient] = None
+
+        logger.info(f"AIRecognizer initialized, enabled={self.enabled}, active_model={self.active_model_id}, http2={_HTTP2_AVAILABLE}")
+
+    def close(self):
+        """关闭HTTP客户端,释放连接池"""
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
     
-    def is_available(self) -> bool:
-        """检查AI识别是否可用"""
+    def _resolve(self):
+        """解析激活的(model, provider)组合并缓存可用性、API地址与不可用原因"""
+        self._resolved = None
+        self._resolved_api_url = None
+        self._available = False
+        self._unavailability_reason = None
+
         if not self.enabled:
-            return False
-        
+            self._unavailability_reason = "AI识别功能不可用,请检查配置: AI功能未启用"
+            return
+
         if not self.active_model_id:
-            return False
-        
+            self._unavailability_reason = "AI识别功能不可用,请检查配置: 未选择激活的模型"
+            return
+
         model = self.models.get(self.active_model_id)
         if not model:
-            return False
-        
-        provider = self.providers.get(model['provider_id'])
-        if not provider or not provider.get('enabled'):
-            return False
-        
+            self._unavailability_reason = (
+                f"AI识别功能不可用,请检查配置: 模型{self.active_model_id}不存在"
+            )
+            return
+
+        provider_id = model.get('provider_id')
+        provider = self.providers.get(provider_id)
+        if not provider:
+            self._unavailability_reason = (
+                f"AI识别功能不可用,请检查配置: 提供商{provider_id}不存在"
+            )
+            return
+        if not provider.get('enabled'):
+            self._unavailability_reason = (
+                f"AI识别功能不可用,请检查配置: 提供商{provider_id}未启用"
+            )
+            return
         if not provider.get('api_key'):
-            return False
-        
-        return True
+            self._unavailability_reason = (
+                f"AI识别功能不可用,请检查配置: 提供商{provider_id}缺少API Key"
+            )
+            return
+
+        # 如果api_base已经包含/chat/completions,直接使用;否则添加
+        api_base = provider['api_base'].rstrip('/')
+        if api_base.endswith('/chat/completions'):
+            self._resolved_api_url = api_base
+        else:
+            self._resolved_api_url = f"{api_base}/chat/completions"
+
+        self._resolved = (model, provider)
+        self._available = True
+
+    def reload_config(self, config: Dict[str, Any]):
+        """更新配置并重新解析可用性"""
+        self.config = config
+        self.enabled = config.get('enabled', False)
+        self.providers = {p['id']: p for p in config.get('providers', [])}
+        self.models = {m['id']: m for m in config.get('models', [])}
+        self.active_model_id = config.get('active_model_id')
+        self._resolve()
+
+    def is_available(self) -> bool:
+        """检查AI识别是否可用"""
+        return self._available
+
+    def get_unavailability_reason(self) -> Optional[str]:
+        """AI识别不可用的具体原因(配置解析时缓存),可用时返回None"""
+        return self._unavailability_reason
     
     def encode_image(self, image: np.ndarray) -> str:
         """
         将图像编码为base64字符串
-        
+
         Args:
             image: OpenCV图像
-            
+
         Returns:
             base64编码的图像字符串
         """
-        # 转换为JPEG格式
-        success, buffer = cv2.imencode('.jpg', image)
-        if not success:
-            raise Exception("Failed to encode image")
-        
-        # 转换为base64
-        base64_str = base64.b64encode(buffer).decode('utf-8')
-        return base64_str
+        # 超大图先缩到模型有效输入分辨率,网络传输是主要耗时
+        max_side = self.config.get('max_image_side', 1568)
+        height, width = image.shape[:2]
+        if max(height, width) > max_side:
+            scale = max_side / max(height, width)
+            image = cv2.resize(
+                image,
+                (int(width * scale), int(height * scale)),
+                interpolation=cv2.INTER_AREA
+            )
+
+        # 转换为JPEG格式,质量85在体积和识别效果间平衡
+        quality = self.config.get('jpeg_quality', 85)
+        if _TURBO_JPEG is not None and len(image.shape) == 3 and image.shape[2] == 3:
+            buffer = _TURBO_JPEG.encode(
+                image,
+                quality=quality,
+                pixel_format=TJPF_BGR,
+                jpeg_subsample=TJSAMP_420
+            )
+        else:
+            success, buffer = cv2.imencode('.jpg', image, [
+                int(cv2.IMWRITE_JPEG_QUALITY), quality,
+                int(cv2.IMWRITE_JPEG_OPTIMIZE), 1
+            ])
+            if not success:
+                raise Exception("Failed to encode image")
+
+        # 转换为base64(buffer支持缓冲区协议,无需tobytes拷贝)
+        return _b64encode(buffer).decode('ascii')
     
     def recognize(self, image: np.ndarray, stream: bool = False):
         """
@@ -82,21 +194,69 @@ class AIRecognizer:
         """
         if not self.is_available():
             raise Exception("AI识别功能不可用,请检查配置")
-        
-        model = self.models[self.active_model_id]
-        provider = self.providers[model['provider_id']]
-        
+
+        model, provider = self._resolved
+
         logger.info(f"Using AI model: {model['name']} ({model['model_name']}), stream={stream}")
-        
+
         # 编码图像
         base64_image = self.encode_image(image)
+
+        headers, payload = self._build_request(model, provider, base64_image, stream)
+
+        logger.debug(f"Request payload (without image): model={payload['model']}, temperature={payload['temperature']}, max_tokens={payload['max_tokens']}, stream={stream}")
         
-        # 构建请求
+        # 发送请求
+        try:
+            api_url = self._resolved_api_url
+            logger.debug(f"Calling AI API: {api_url}")
+
+            if stream:
+                # 流式:保持响应打开,返回生成器
+                request = self._client.build_request(
+                    'POST', api_url, headers=headers, json=payload
+                )
+                response = self._client.send(request, stream=True)
+                if response.status_code >= 400:
+                    response.read()  # 读取错误体,便于后续提取错误详情
+                response.raise_for_status()
+                return self._stream_response(response)
+            else:
+                # 非流式，返回完整结果
+                response = self._client.post(api_url, headers=headers, json=payload)
+                response.raise_for_status()
+                result = response.json()
+                
+                # 解析响应
+                content = result['choices'][0]['message']['content']
+                logger.debug(f"AI response: {content}")
+
+                return self._parse_content(content)
+        
+        except httpx.HTTPError as e:
+            logger.error(f"AI API request failed: {e}")
+            # 尝试获取详细错误信息
+            if hasattr(e, 'response') and e.response is not None:
+                try:
+                    error_detail = e.response.json()
+                    logger.error(f"API error detail: {error_detail}")
+                except:
+                    logger.error(f"API response text: {e.response.text}")
+            raise Exception(f"AI识别请求失败: {str(e)}")
+
+    def _build_request(
+        self,
+        model: Dict[str, Any],
+        provider: Dict[str, Any],
+        base64_image: str,
+        stream: bool
+    ):
+        """构建API请求的headers和payload"""
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {provider['api_key']}"
         }
-        
+
         messages = [
             {
                 "role": "system",
@@ -118,7 +278,7 @@ class AIRecognizer:
                 ]
             }
         ]
-        
+
         payload = {
             "model": model['model_name'],
             "messages": messages,
@@ -126,87 +286,138 @@ class AIRecognizer:
             "temperature": model.get('temperature', 0.2),
             "stream": stream
         }
-        
-        logger.debug(f"Request payload (without image): model={payload['model']}, temperature={payload['temperature']}, max_tokens={payload['max_tokens']}, stream={stream}")
-        
-        # 发送请求
+
+        return headers, payload
+
+    @staticmethod
+    def _extract_braced(content: str) -> Optional[str]:
+        """无代码块时用括号计数扫描提取顶层JSON对象"""
+        start = content.find('{')
+        if start < 0:
+            return None
+        depth = 0
+        for i in range(start, len(content)):
+            ch = content[i]
+            if ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    return content[start:i + 1]
+        return None
+
+    def _parse_content(self, content: str) -> Dict[str, Any]:
+        """从AI回复文本中提取JSON并格式化为标准结果"""
         try:
-            # 如果api_base已经包含/chat/completions,直接使用;否则添加
-            api_base = provider['api_base'].rstrip('/')
-            if api_base.endswith('/chat/completions'):
-                api_url = api_base
+            # 提取JSON部分:优先取```json代码块,否则按顶层大括号扫描
+            match = self._FENCE_RE.search(content)
+            if match:
+                content = match.group(1).strip()
             else:
-                api_url = f"{api_base}/chat/completions"
-            logger.debug(f"Calling AI API: {api_url}")
-            
-            response = requests.post(
-                api_url,
-                headers=headers,
-                json=payload,
-                timeout=60,
-                stream=stream
+                braced = self._extract_braced(content)
+                if braced is not None:
+                    content = braced
+
+            parsed_result = json.loads(content)
+            return self._format_result(parsed_result)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse AI response as JSON: {e}")
+            # 返回原始文本
+            return {
+                "barcodes": [],
+                "texts": [{"text": content, "position": {"x": 0, "y": 0, "width": 0, "height": 0}}],
+                "raw_response": content
+            }
+
+    def _get_aclient(self) -> httpx.AsyncClient:
+        """按需创建共享的异步HTTP客户端"""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                http2=_HTTP2_AVAILABLE,
+                timeout=60.0,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
             )
-            
-            response.raise_for_status()
-            
-            if stream:
-                # 返回生成器
-                return self._stream_response(response)
-            else:
-                # 非流式，返回完整结果
-                result = response.json()
-                
-                # 解析响应
-                content = result['choices'][0]['message']['content']
-                logger.debug(f"AI response: {content}")
-                
-                # 尝试解析JSON
-                try:
-                    # 提取JSON部分
-                    if '```json' in content:
-                        content = content.split('```json')[1].split('```')[0].strip()
-                    elif '```' in content:
-                        content = content.split('```')[1].split('```')[0].strip()
-                    
-                    parsed_result = json.loads(content)
-                    return self._format_result(parsed_result)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse AI response as JSON: {e}")
-                    # 返回原始文本
-                    return {
-                        "barcodes": [],
-                        "texts": [{"text": content, "position": {"x": 0, "y": 0, "width": 0, "height": 0}}],
-                        "raw_response": content
-                    }
-        
-        except requests.exceptions.RequestException as e:
-            logger.error(f"AI API request failed: {e}")
-            # 尝试获取详细错误信息
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_detail = e.response.json()
-                    logger.error(f"API error detail: {error_detail}")
-                except:
-                    logger.error(f"API response text: {e.response.text}")
-            raise Exception(f"AI识别请求失败: {str(e)}")
-    
+        return self._aclient
+
+    async def _arecognize_one(
+        self,
+        client: httpx.AsyncClient,
+        image: np.ndarray
+    ) -> Dict[str, Any]:
+        """异步识别单张图像(编码在线程池中执行,避免阻塞事件循环)"""
+        model, provider = self._resolved
+
+        base64_image = await asyncio.to_thread(self.encode_image, image)
+        headers, payload = self._build_request(model, provider, base64_image, False)
+
+        response = await client.post(
+            self._resolved_api_url, headers=headers, json=payload
+        )
+        response.raise_for_status()
+        result = response.json()
+
+        content = result['choices'][0]['message']['content']
+        return self._parse_content(content)
+
+    async def recognize_many(
+        self,
+        images: List[np.ndarray],
+        concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        并发识别多张图像
+
+        多个请求共享同一异步客户端的连接池(HTTP/2下复用单条连接),
+        上传、推理与解析相互重叠,吞吐量随并发度提升
+
+        Args:
+            images: 输入图像列表
+            concurrency: 最大并发请求数
+
+        Returns:
+            识别结果列表,顺序与输入一致
+        """
+        if not self.is_available():
+            raise Exception("AI识别功能不可用,请检查配置")
+
+        client = self._get_aclient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _bounded(image):
+            async with semaphore:
+                return await self._arecognize_one(client, image)
+
+        return list(await asyncio.gather(*(_bounded(img) for img in images)))
+
+    async def aclose(self):
+        """关闭异步HTTP客户端"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
     def _stream_response(self, response):
         """
         处理流式响应
-        
+
         Args:
-            response: requests响应对象
-            
+            response: httpx流式响应对象
+
         Yields:
             每个数据块
         """
-        for line in response.iter_lines():
-            if line:
-                line = line.decode('utf-8')
-                if line.startswith('data: '):
+        try:
+            # 直接按字节流切分SSE行,省去每行的UTF-8解码(json.loads可直接消费bytes)
+            buffer = b''
+            for raw in response.iter_raw():
+                buffer += raw
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    line = line.rstrip(b'\r')
+                    if not line.startswith(b'data: '):
+                        continue
                     data = line[6:]
-                    if data == '[DONE]':
-                        break
+                    if data == b'[DONE]':
+                        return
                     try:
                         chunk = json.loads(data)
                         delta = chunk['choices'][0]['delta']
@@ -214,6 +425,8 @@ class AIRecognizer:
                             yield delta['content']
                     except json.JSONDecodeError:
                         continue
+        finally:
+            response.close()
     
     def _format_result(self, parsed_result: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -7,6 +7,54 @@ from typing import List, Dict, Any, Tuple
 from loguru import logger
 import math
 
+from .positions import PositionTable
+
+# numba为可选加速依赖:安装后评分核用LLVM JIT生成SIMD并行代码,缺失时退回NumPy路径
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+# scipy为可选依赖:安装后强关联用匈牙利算法做全局最优一对一分配,
+# 缺失时退回按条码顺序先到先得的贪心分配
+try:
+    from scipy.optimize import linear_sum_assignment
+    _HAS_SCIPY = True
+except ImportError:
+    _HAS_SCIPY = False
+
+
+if _HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_kernel(bc_xywh, tx_xywh, weights4, mul):
+        """
+        JIT评分核:按(B,T)逐对计算关联评分
+
+        weights4顺序为[right, left, bottom, top]
+        """
+        n_bc = bc_xywh.shape[0]
+        n_tx = tx_xywh.shape[0]
+        score = np.zeros((n_bc, n_tx), dtype=np.float64)
+        for b in prange(n_bc):
+            bc_cx = bc_xywh[b, 0] + bc_xywh[b, 2] * 0.5
+            bc_cy = bc_xywh[b, 1] + bc_xywh[b, 3] * 0.5
+            max_r_sq = (bc_xywh[b, 2] * mul) ** 2
+            if max_r_sq <= 0:
+                continue
+            for t in range(n_tx):
+                dx = tx_xywh[t, 0] + tx_xywh[t, 2] * 0.5 - bc_cx
+                dy = tx_xywh[t, 1] + tx_xywh[t, 3] * 0.5 - bc_cy
+                d_sq = dx * dx + dy * dy
+                if d_sq > max_r_sq:
+                    continue
+                if abs(dx) > abs(dy):
+                    w = weights4[0] if dx > 0 else weights4[1]
+                else:
+                    w = weights4[2] if dy > 0 else weights4[3]
+                score[b, t] = (1.0 - math.sqrt(d_sq / max_r_sq)) * w
+        return score
+
 
 class AssociationAnalyzer:
     """关联分析引擎"""
@@ -36,7 +84,15 @@ class AssociationAnalyzer:
         }
         self.strong_threshold = strong_threshold
         self.weak_threshold = weak_threshold
-        
+
+        # JIT评分核使用的方向权重向量,顺序固定为[right, left, bottom, top]
+        self._weights4 = np.array([
+            self.direction_weights.get("right", 0.5),
+            self.direction_weights.get("left", 0.5),
+            self.direction_weights.get("bottom", 0.5),
+            self.direction_weights.get("top", 0.5)
+        ], dtype=np.float64)
+
         logger.info(f"AssociationAnalyzer initialized with thresholds: strong={strong_threshold}, weak={weak_threshold}")
     
     def _get_center(self, position: Dict[str, int]) -> Tuple[float, float]:
@@ -45,15 +101,15 @@ class AssociationAnalyzer:
         y = position["y"] + position["height"] / 2
         return (x, y)
     
-    def _calculate_distance(
-        self, 
-        pos1: Dict[str, int], 
+    def _distance_sq(
+        self,
+        pos1: Dict[str, int],
         pos2: Dict[str, int]
     ) -> float:
-        """计算两个区域中心点的欧氏距离"""
+        """计算两个区域中心点欧氏距离的平方(半径裁剪无需开方)"""
         cx1, cy1 = self._get_center(pos1)
         cx2, cy2 = self._get_center(pos2)
-        return math.sqrt((cx1 - cx2) ** 2 + (cy1 - cy2) ** 2)
+        return (cx1 - cx2) ** 2 + (cy1 - cy2) ** 2
     
     def _get_direction(
         self, 
@@ -91,19 +147,20 @@ class AssociationAnalyzer:
         """
         barcode_pos = barcode["position"]
         text_pos = text_region["position"]
-        
-        # 计算最大搜索半径
-        max_radius = barcode_pos["width"] * self.max_search_radius_multiplier
-        
-        # 计算距离
-        distance = self._calculate_distance(barcode_pos, text_pos)
-        
+
+        # 计算最大搜索半径(平方比较,裁剪路径不开方)
+        max_radius_sq = (barcode_pos["width"] * self.max_search_radius_multiplier) ** 2
+        if max_radius_sq <= 0:
+            return 0.0
+
+        dist_sq = self._distance_sq(barcode_pos, text_pos)
+
         # 超出搜索半径,不关联
-        if distance > max_radius:
+        if dist_sq > max_radius_sq:
             return 0.0
-        
-        # 距离评分(距离越近评分越高)
-        distance_score = 1.0 - (distance / max_radius)
+
+        # 距离评分(距离越近评分越高),只对通过裁剪的配对开方
+        distance_score = 1.0 - math.sqrt(dist_sq / max_radius_sq)
         
         # 方向权重
         direction = self._get_direction(barcode_pos, text_pos)
@@ -114,6 +171,79 @@ class AssociationAnalyzer:
         
         return score
     
+    @staticmethod
+    def _position_matrix(objects: List[Dict[str, Any]]) -> np.ndarray:
+        """把对象列表的position打包为(N,4)的xywh数组"""
+        return PositionTable.from_objects(objects).xywh
+
+    def _score_matrix(
+        self,
+        barcodes: List[Dict[str, Any]],
+        text_regions: List[Dict[str, Any]]
+    ) -> np.ndarray:
+        """
+        向量化计算所有条码×文字区域的关联评分矩阵
+
+        Returns:
+            (B, T)评分矩阵,超出搜索半径的对为0
+        """
+        bc = self._position_matrix(barcodes)
+        tx = self._position_matrix(text_regions)
+
+        if _HAS_NUMBA:
+            return _score_kernel(
+                bc, tx, self._weights4, float(self.max_search_radius_multiplier)
+            )
+
+        bc_centers = bc[:, :2] + bc[:, 2:] / 2
+        tx_centers = tx[:, :2] + tx[:, 2:] / 2
+
+        # 广播计算所有配对的中心距离平方
+        delta = tx_centers[None, :, :] - bc_centers[:, None, :]
+        dx, dy = delta[..., 0], delta[..., 1]
+        dist_sq = dx * dx + dy * dy
+
+        max_radius_sq = (bc[:, 2:3] * self.max_search_radius_multiplier) ** 2  # (B,1)
+
+        # 按主方向选取权重
+        weights = np.where(
+            np.abs(dx) > np.abs(dy),
+            np.where(dx > 0, self.direction_weights.get("right", 0.5),
+                     self.direction_weights.get("left", 0.5)),
+            np.where(dy > 0, self.direction_weights.get("bottom", 0.5),
+                     self.direction_weights.get("top", 0.5))
+        )
+
+        # 半径裁剪用平方距离完成,只对存活的配对开方
+        score = np.zeros_like(dist_sq)
+        valid = (dist_sq <= max_radius_sq) & (max_radius_sq > 0)
+        if valid.any():
+            ratio = np.ones_like(dist_sq)
+            np.divide(dist_sq, np.broadcast_to(max_radius_sq, dist_sq.shape),
+                      out=ratio, where=valid)
+            score[valid] = (1.0 - np.sqrt(ratio[valid])) * weights[valid]
+        return score
+
+    def _strong_assignment(
+        self,
+        score_matrix: np.ndarray
+    ) -> Dict[int, int]:
+        """
+        强关联的全局最优一对一分配(匈牙利算法)
+
+        Returns:
+            {文字索引: 条码索引}映射,只包含评分达到强关联阈值的配对;
+            scipy缺失时返回None,调用方退回贪心分配
+        """
+        if not _HAS_SCIPY:
+            return None
+        rows, cols = linear_sum_assignment(-score_matrix)
+        return {
+            int(c): int(r)
+            for r, c in zip(rows, cols)
+            if float(score_matrix[r, c]) >= self.strong_threshold
+        }
+
     def associate_text_with_barcodes(
         self,
         barcodes: List[Dict[str, Any]],
@@ -121,11 +251,11 @@ class AssociationAnalyzer:
     ) -> List[Dict[str, Any]]:
         """
         为每个条码关联相关的文字区域
-        
+
         Args:
             barcodes: 条码列表
             text_regions: 文字区域列表
-            
+
         Returns:
             关联结果列表,每个包含:
             - barcode: 条码信息
@@ -134,29 +264,49 @@ class AssociationAnalyzer:
         """
         results = []
         used_text_indices = set()
-        
-        for barcode in barcodes:
+
+        # 评分矩阵一次性向量化计算
+        score_matrix = None
+        strong_owner = None
+        if barcodes and text_regions:
+            score_matrix = self._score_matrix(barcodes, text_regions)
+            strong_owner = self._strong_assignment(score_matrix)
+            if strong_owner is not None:
+                used_text_indices.update(strong_owner)
+
+        for bc_idx, barcode in enumerate(barcodes):
             associations = []
-            
+
             for idx, text_region in enumerate(text_regions):
-                if idx in used_text_indices:
-                    continue
-                
-                score = self._calculate_association_score(barcode, text_region)
-                
-                if score >= self.weak_threshold:
-                    associations.append({
-                        "text": text_region["text"],
-                        "position": text_region["position"],
-                        "confidence": text_region.get("confidence", 1.0),
-                        "score": score,
-                        "relation_type": "strong" if score >= self.strong_threshold else "weak"
-                    })
-                    
-                    # 如果是强关联,标记为已使用
-                    if score >= self.strong_threshold:
+                if strong_owner is not None:
+                    # 全局最优分配:强关联文字只归属被指派的条码,其余按弱关联共享
+                    owner = strong_owner.get(idx)
+                    if owner is not None and owner != bc_idx:
+                        continue
+                    score = float(score_matrix[bc_idx, idx])
+                    if score < self.weak_threshold:
+                        continue
+                    is_strong = owner == bc_idx
+                else:
+                    # 贪心分配:按条码顺序先到先得
+                    if idx in used_text_indices:
+                        continue
+                    score = float(score_matrix[bc_idx, idx])
+                    if score < self.weak_threshold:
+                        continue
+                    is_strong = score >= self.strong_threshold
+                    if is_strong:
                         used_text_indices.add(idx)
-            
+
+                associations.append({
+                    "text": text_region["text"],
+                    "position": text_region["position"],
+                    "confidence": text_region.get("confidence", 1.0),
+                    "score": score,
+                    "relation_type": "strong" if is_strong else "weak"
+                })
+
+
             # 按评分降序排序
             associations.sort(key=lambda x: x["score"], reverse=True)
             
@@ -168,7 +318,8 @@ class AssociationAnalyzer:
             
             results.append(result)
             
-            logger.debug(f"Barcode {barcode['barcode_data']}: {len(associations)} associations")
+            # 模板+参数形式:DEBUG关闭时loguru在格式化前短路,每个条码不再构造字符串
+            logger.debug("Barcode {}: {} associations", barcode['barcode_data'], len(associations))
         
         # 记录未关联的文字(独立文字)
         independent_text = []
@@ -5,40 +5,70 @@
 import cv2
 import numpy as np
 from pyzbar import pyzbar
-from typing import List, Dict, Any, Tuple
+from pyzbar.pyzbar import ZBarSymbol
+from typing import List, Dict, Any, Optional, Tuple
 from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
 import time
 
+from .positions import PositionTable
+
 
 class BarcodeDetector:
     """条码识别引擎"""
-    
-    def __init__(self):
-        """初始化条码检测器"""
+
+    # 产品实际涉及的符号集,限定后zbar跳过其余解码器(CODABAR/I25/DATABAR等)
+    DEFAULT_SYMBOLS = [
+        ZBarSymbol.QRCODE,
+        ZBarSymbol.CODE128,
+        ZBarSymbol.CODE39,
+        ZBarSymbol.EAN13,
+        ZBarSymbol.EAN8,
+        ZBarSymbol.UPCA,
+    ]
+
+    def __init__(self, symbols: Optional[List[ZBarSymbol]] = None):
+        """
+        初始化条码检测器
+
+        Args:
+            symbols: 要扫描的条码符号集,None表示使用默认集合
+        """
+        self.symbols = symbols or self.DEFAULT_SYMBOLS
+        # 增强识别的多个pass相互独立,cv2/pyzbar均释放GIL,可并行执行
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 4)
+        )
+
+        # 增强pass使用的卷积核/形态学核/CLAHE对象只构建一次
+        self._sharpen_kernel = np.array(
+            [[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]], dtype=np.float32
+        )
+        self._morph_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self._clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+        # CLAHE.apply不保证可重入,并行pass下用锁保护
+        self._clahe_lock = threading.Lock()
+
         logger.info("BarcodeDetector initialized")
     
-    def decode_barcodes(self, image: np.ndarray) -> List[Dict[str, Any]]:
+    def _decode_raw(self, image: np.ndarray) -> List[Any]:
         """
-        识别图像中的所有条码
-        
-        Args:
-            image: 输入图像(灰度或彩色)
-            
-        Returns:
-            条码列表,每个条码包含:
-            - barcode_data: 条码内容
-            - barcode_type: 条码类型
-            - position: 位置信息 {x, y, width, height}
-            - confidence: 置信度(pyzbar不提供,设为1.0)
-            - decode_time: 解码耗时(毫秒)
-            - polygon: 多边形顶点坐标
+        解码并返回(去重键, 条码信息)列表
+
+        去重键为(条码类型, 原始bytes数据):二进制QR内容经UTF-8有损
+        解码后可能混淆,按原始字节去重才是无损的
         """
-        start_time = time.time()
-        
+        start_time = time.perf_counter()
+
         try:
             # pyzbar解码
-            decoded_objects = pyzbar.decode(image)
-            
+            decoded_objects = pyzbar.decode(image, symbols=self.symbols)
+
+            # 解码耗时只读一次时钟,所有条码记录同一耗时
+            decode_time = int((time.perf_counter() - start_time) * 1000)
+
             barcodes = []
             for obj in decoded_objects:
                 # 提取位置信息
@@ -61,130 +91,154 @@ class BarcodeDetector:
                     "barcode_type": obj.type,
                     "position": position,
                     "confidence": 1.0,  # pyzbar不提供置信度
-                    "decode_time": int((time.time() - start_time) * 1000),
+                    "decode_time": decode_time,
                     "polygon": polygon
                 }
-                
-                barcodes.append(barcode_info)
-                logger.debug(f"Detected {obj.type}: {data}")
-            
-            decode_time = int((time.time() - start_time) * 1000)
+
+                barcodes.append(((obj.type, obj.data), barcode_info))
+                # 模板+参数形式:DEBUG关闭时loguru在格式化前短路,热循环内不再构造字符串
+                logger.debug("Detected {}: {}", obj.type, data)
+
             logger.info(f"Detected {len(barcodes)} barcodes in {decode_time}ms")
-            
+
             return barcodes
-        
+
         except Exception as e:
             logger.error(f"Error detecting barcodes: {e}")
             return []
+
+    def decode_barcodes(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        识别图像中的所有条码
+
+        Args:
+            image: 输入图像(灰度或彩色)
+
+        Returns:
+            条码列表,每个条码包含:
+            - barcode_data: 条码内容
+            - barcode_type: 条码类型
+            - position: 位置信息 {x, y, width, height}
+            - confidence: 置信度(pyzbar不提供,设为1.0)
+            - decode_time: 解码耗时(毫秒)
+            - polygon: 多边形顶点坐标
+        """
+        return [info for _, info in self._decode_raw(image)]
     
+    def _enhancement_passes(
+        self,
+        image: np.ndarray,
+        gray: np.ndarray,
+        scale: float = 1.0
+    ) -> List[Tuple[str, Any, float]]:
+        """
+        构建增强识别的各个pass
+
+        Args:
+            image: 原始图像(原图pass使用)
+            gray: 灰度图(可能已降采样),增强pass在其上执行
+            scale: gray相对原图的缩放比例,用于坐标还原
+
+        Returns:
+            (名称, 图像生成函数, 坐标缩放比例)的列表
+        """
+        # Otsu阈值只计算一次,反色图通过按位取反得到,省去第二次直方图计算
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+        def _equalized():
+            return cv2.equalizeHist(gray)
+
+        def _clahe():
+            with self._clahe_lock:
+                return self._clahe.apply(gray)
+
+        def _otsu():
+            return binary
+
+        def _otsu_inv():
+            return cv2.bitwise_not(binary)
+
+        def _sharpened():
+            return cv2.filter2D(gray, -1, self._sharpen_kernel)
+
+        def _morph_close():
+            return cv2.morphologyEx(gray, cv2.MORPH_CLOSE, self._morph_kernel)
+
+        passes = [
+            ("original", lambda: image, 1.0),
+            ("contrast enhancement", _equalized, scale),
+            ("CLAHE", _clahe, scale),
+            ("Otsu", _otsu, scale),
+            ("inverted Otsu", _otsu_inv, scale),
+            ("sharpening", _sharpened, scale),
+            ("morphology", _morph_close, scale),
+        ]
+
+        # 图像较小时增加放大pass(条码很小的场景)
+        height, width = gray.shape[:2]
+        if max(height, width) < 1500:
+            passes.append((
+                "upscaling",
+                lambda: cv2.resize(gray, None, fx=1.5, fy=1.5, interpolation=cv2.INTER_CUBIC),
+                scale * 1.5
+            ))
+
+        return passes
+
+    def _decode_pass(self, prepare, scale: float) -> List[Any]:
+        """执行单个增强pass:生成图像并解码,必要时把坐标缩放回原始尺寸"""
+        barcodes = self._decode_raw(prepare())
+        if scale != 1.0:
+            for _, bc in barcodes:
+                pos = bc['position']
+                pos['x'] = int(pos['x'] / scale)
+                pos['y'] = int(pos['y'] / scale)
+                pos['width'] = int(pos['width'] / scale)
+                pos['height'] = int(pos['height'] / scale)
+        return barcodes
+
     def decode_with_enhancement(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """
         使用多种图像增强方法进行多次解码，合并结果
-        
+
+        各增强pass相互独立,在线程池中并行执行,
+        完成后按固定pass顺序合并去重,保证结果确定性
+
         Args:
             image: 输入图像
-            
+
         Returns:
             条码列表
         """
-        all_barcodes = []
-        detected_data = set()  # 用于去重
-        
-        # 第一次尝试:原图
-        logger.debug("Try 1: Original image")
-        barcodes = self.decode_barcodes(image)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-        
-        # 第二次尝试:增强对比度
-        logger.debug("Try 2: Contrast enhancement")
-        if len(image.shape) == 2:
-            enhanced = cv2.equalizeHist(image)
-        else:
-            enhanced = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            enhanced = cv2.equalizeHist(enhanced)
-        
-        barcodes = self.decode_barcodes(enhanced)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-                logger.debug(f"Found new barcode with contrast enhancement: {bc['barcode_data']}")
-        
-        # 第三次尝试:CLAHE自适应直方图均衡化
-        logger.debug("Try 3: CLAHE enhancement")
         gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-        clahe_img = clahe.apply(gray)
-        
-        barcodes = self.decode_barcodes(clahe_img)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-                logger.debug(f"Found new barcode with CLAHE: {bc['barcode_data']}")
-        
-        # 第四次尝试:二值化(Otsu)
-        logger.debug("Try 4: Otsu binarization")
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        barcodes = self.decode_barcodes(binary)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-                logger.debug(f"Found new barcode with Otsu: {bc['barcode_data']}")
-        
-        # 第五次尝试:反色二值化
-        logger.debug("Try 5: Inverted Otsu binarization")
-        _, binary_inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        barcodes = self.decode_barcodes(binary_inv)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-                logger.debug(f"Found new barcode with inverted Otsu: {bc['barcode_data']}")
-        
-        # 第六次尝试:锐化
-        logger.debug("Try 6: Sharpening")
-        kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-        sharpened = cv2.filter2D(gray, -1, kernel)
-        barcodes = self.decode_barcodes(sharpened)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-                logger.debug(f"Found new barcode with sharpening: {bc['barcode_data']}")
-        
-        # 第七次尝试:形态学操作(增强条码线条)
-        logger.debug("Try 7: Morphological operations")
-        kernel_morph = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        morph_close = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel_morph)
-        barcodes = self.decode_barcodes(morph_close)
-        for bc in barcodes:
-            if bc['barcode_data'] not in detected_data:
-                all_barcodes.append(bc)
-                detected_data.add(bc['barcode_data'])
-                logger.debug(f"Found new barcode with morphology: {bc['barcode_data']}")
-        
-        # 第八次尝试:增大图像(如果条码很小)
-        logger.debug("Try 8: Upscaling")
+
+        # 超大图的增强pass在降采样副本上扫描(pyzbar耗时与像素数成正比),
+        # 原图pass保持全分辨率以保留小条码的识别能力
         height, width = gray.shape[:2]
-        if max(height, width) < 1500:
-            upscaled = cv2.resize(gray, None, fx=1.5, fy=1.5, interpolation=cv2.INTER_CUBIC)
-            barcodes = self.decode_barcodes(upscaled)
-            # 调整坐标回原始尺寸
-            for bc in barcodes:
-                if bc['barcode_data'] not in detected_data:
-                    bc['position']['x'] = int(bc['position']['x'] / 1.5)
-                    bc['position']['y'] = int(bc['position']['y'] / 1.5)
-                    bc['position']['width'] = int(bc['position']['width'] / 1.5)
-                    bc['position']['height'] = int(bc['position']['height'] / 1.5)
+        scan_scale = min(1.0, 2000 / max(height, width))
+        if scan_scale < 1.0:
+            gray = cv2.resize(
+                gray, None, fx=scan_scale, fy=scan_scale,
+                interpolation=cv2.INTER_AREA
+            )
+
+        passes = self._enhancement_passes(image, gray, scan_scale)
+        futures = [
+            (name, self._executor.submit(self._decode_pass, prepare, scale))
+            for name, prepare, scale in passes
+        ]
+
+        all_barcodes = []
+        detected_keys = set()  # 用于去重,键为(类型, 原始bytes)
+
+        for name, future in futures:
+            for key, bc in future.result():
+                if key not in detected_keys:
                     all_barcodes.append(bc)
-                    detected_data.add(bc['barcode_data'])
-                    logger.debug(f"Found new barcode with upscaling: {bc['barcode_data']}")
-        
+                    detected_keys.add(key)
+                    if name != "original":
+                        logger.debug("Found new barcode with {}: {}", name, bc['barcode_data'])
+
         logger.info(f"Total detected {len(all_barcodes)} unique barcodes using multi-method approach")
         return all_barcodes
     
@@ -240,45 +294,60 @@ class BarcodeDetector:
         return image[y1:y2, x1:x2]
     
     def draw_barcodes(
-        self, 
-        image: np.ndarray, 
+        self,
+        image: np.ndarray,
         barcodes: List[Dict[str, Any]],
         color: Tuple[int, int, int] = (0, 255, 0),
-        thickness: int = 2
+        thickness: int = 2,
+        inplace: bool = False
     ) -> np.ndarray:
         """
         在图像上绘制条码边界框
-        
+
         Args:
             image: 输入图像
             barcodes: 条码列表
             color: 边框颜色(BGR)
             thickness: 线条宽度
-            
+            inplace: 允许直接写入输入图像(省去整图拷贝,灰度图仍需转换)
+
         Returns:
             标注后的图像
         """
-        result = image.copy()
-        if len(result.shape) == 2:
-            result = cv2.cvtColor(result, cv2.COLOR_GRAY2BGR)
-        
+        if len(image.shape) == 2:
+            result = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif inplace:
+            result = image
+        else:
+            result = image.copy()
+
+        if not barcodes:
+            return result
+
+        # 位置一次性打包为整数数组,所有矩形通过一次polylines调用批量绘制
+        rects = PositionTable.from_objects(barcodes).xywh.astype(np.int32)
+        x, y = rects[:, 0], rects[:, 1]
+        x2, y2 = x + rects[:, 2], y + rects[:, 3]
+        corners = np.stack([
+            np.stack([x, y], axis=1),
+            np.stack([x2, y], axis=1),
+            np.stack([x2, y2], axis=1),
+            np.stack([x, y2], axis=1),
+        ], axis=1)  # (N, 4, 2)
+        cv2.polylines(result, corners, True, color, thickness)
+
+        # 绘制序号和类型
+        font = cv2.FONT_HERSHEY_SIMPLEX
         for idx, barcode in enumerate(barcodes):
-            pos = barcode["position"]
-            x, y, w, h = pos["x"], pos["y"], pos["width"], pos["height"]
-            
-            # 绘制矩形
-            cv2.rectangle(result, (x, y), (x + w, y + h), color, thickness)
-            
-            # 绘制序号和类型
             label = f"{idx + 1}:{barcode['barcode_type']}"
             cv2.putText(
-                result, 
-                label, 
-                (x, y - 5), 
-                cv2.FONT_HERSHEY_SIMPLEX, 
-                0.5, 
-                color, 
+                result,
+                label,
+                (int(x[idx]), int(y[idx]) - 5),
+                font,
+                0.5,
+                color,
                 1
             )
-        
+
         return result
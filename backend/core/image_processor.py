@@ -4,23 +4,43 @@
 """
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional
 from loguru import logger
 from pathlib import Path
+from PIL import Image
+
+from . import _fast_ops
 
 
 class ImageProcessor:
     """图像预处理引擎"""
-    
+
     def __init__(self, max_size: int = 2000):
         """
         初始化图像处理器
-        
+
         Args:
             max_size: 最大图像尺寸(像素)
         """
         self.max_size = max_size
+        # CLAHE对象只构建一次,避免每张图重复分配tile直方图/LUT
+        # CLAHE.apply不保证可重入,多线程下用锁保护
+        self._clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        self._clahe_lock = threading.Lock()
+        # 快速路径的乒乓缓冲区按线程持有,避免每张图的增强/去噪输出重复malloc
+        self._scratch = threading.local()
         logger.info(f"ImageProcessor initialized with max_size={max_size}")
+
+    def _scratch_pair(self, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """获取当前线程的(A, B)乒乓缓冲区,尺寸变化时重建"""
+        bufs = getattr(self._scratch, "bufs", None)
+        if bufs is None or bufs[0].shape != shape:
+            bufs = (np.empty(shape, np.uint8), np.empty(shape, np.uint8))
+            self._scratch.bufs = bufs
+        return bufs
     
     def load_image(self, image_path: str) -> Optional[np.ndarray]:
         """
@@ -33,16 +53,66 @@ class ImageProcessor:
             numpy数组格式的图像,加载失败返回None
         """
         try:
-            image = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            # np.frombuffer零拷贝包装bytes,省去np.fromfile的中间缓冲区
+            with open(image_path, "rb") as f:
+                buf = f.read()
+            image = cv2.imdecode(
+                np.frombuffer(buf, dtype=np.uint8),
+                self._decode_flags(image_path)
+            )
             if image is None:
                 logger.error(f"Failed to load image: {image_path}")
                 return None
-            logger.debug(f"Loaded image: {image_path}, shape={image.shape}")
+            # 模板+参数形式:DEBUG关闭时loguru在格式化前短路
+            logger.debug("Loaded image: {}, shape={}", image_path, image.shape)
             return image
         except Exception as e:
             logger.error(f"Error loading image {image_path}: {e}")
             return None
+
+    def load_images(self, image_paths: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        并发加载多张图像
+
+        磁盘IO与JPEG解码在线程池中相互重叠(cv2解码释放GIL),
+        批量加载的墙钟时间显著低于顺序加载
+
+        Args:
+            image_paths: 图像文件路径列表
+
+        Returns:
+            图像列表,顺序与输入一致,加载失败的项为None
+        """
+        if not image_paths:
+            return []
+        workers = min(len(image_paths), os.cpu_count() or 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.load_image, image_paths))
     
+    def _decode_flags(self, image_path: str) -> int:
+        """
+        根据图像原始尺寸选择解码参数
+
+        后续反正要缩到max_size以内的超大图,直接用libjpeg的
+        scale-on-decode按1/2、1/4、1/8解码,省去全分辨率的IDCT和缓冲区;
+        尺寸只从文件头读取(PIL不解码像素),失败时退回全分辨率解码
+        """
+        try:
+            with Image.open(image_path) as im:
+                max_dim = max(im.size)
+        except Exception:
+            return cv2.IMREAD_COLOR
+
+        # 选择仍保持解码尺寸>=max_size的最大缩减系数,避免后续放大损失质量
+        for factor, flags in (
+            (8, cv2.IMREAD_REDUCED_COLOR_8),
+            (4, cv2.IMREAD_REDUCED_COLOR_4),
+            (2, cv2.IMREAD_REDUCED_COLOR_2),
+        ):
+            if max_dim >= self.max_size * factor:
+                return flags
+        return cv2.IMREAD_COLOR
+
     def resize_if_needed(self, image: np.ndarray) -> np.ndarray:
         """
         如果图像尺寸超过限制,按比例缩小
@@ -60,10 +130,19 @@ class ImageProcessor:
             scale = self.max_size / max_dim
             new_width = int(width * scale)
             new_height = int(height * scale)
-            resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            logger.debug(f"Resized image from {width}x{height} to {new_width}x{new_height}")
+
+            # 超过2倍的缩小先用pyrDown逐次减半:5x5可分离高斯核走SIMD路径,
+            # 比一次性INTER_AREA大比例重采样快得多;最后一步resize到精确尺寸
+            resized = image
+            while max(resized.shape[:2]) >= 2 * self.max_size:
+                resized = cv2.pyrDown(resized)
+            if resized.shape[1] != new_width or resized.shape[0] != new_height:
+                resized = cv2.resize(
+                    resized, (new_width, new_height), interpolation=cv2.INTER_AREA
+                )
+            logger.debug("Resized image from {}x{} to {}x{}", width, height, new_width, new_height)
             return resized
-        
+
         return image
     
     def to_grayscale(self, image: np.ndarray) -> np.ndarray:
@@ -77,7 +156,9 @@ class ImageProcessor:
             灰度图像
         """
         if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            # PNG等带alpha通道的输入是BGRA,需用对应的转换常量
+            code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            gray = cv2.cvtColor(image, code)
             logger.debug("Converted to grayscale")
             return gray
         return image
@@ -92,8 +173,8 @@ class ImageProcessor:
         Returns:
             对比度增强后的图像
         """
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(image)
+        with self._clahe_lock:
+            enhanced = self._clahe.apply(image)
         logger.debug("Applied contrast enhancement")
         return enhanced
     
@@ -107,10 +188,34 @@ class ImageProcessor:
         Returns:
             去噪后的图像
         """
-        denoised = cv2.medianBlur(image, 3)
+        # numba可用时走并行排序网络核(按行多核并行),否则用OpenCV默认实现
+        if (
+            _fast_ops.HAS_NUMBA
+            and image.ndim == 2
+            and image.dtype == np.uint8
+            and image.flags.c_contiguous
+        ):
+            denoised = _fast_ops.median3(image, np.empty_like(image))
+        else:
+            denoised = cv2.medianBlur(image, 3)
         logger.debug("Applied denoising")
         return denoised
     
+    # 拉普拉斯响应标准差低于该值视为低噪声,跳过中值滤波
+    _NOISE_SIGMA_THRESHOLD = 8.0
+
+    def _low_noise(self, gray: np.ndarray) -> bool:
+        """
+        粗估图像噪声水平
+
+        在约128x128的子采样上计算拉普拉斯响应的标准差,
+        耗时约百微秒;低噪声图像可安全跳过整图中值滤波
+        """
+        step = max(1, max(gray.shape[:2]) // 128)
+        sample = gray[::step, ::step]
+        sigma = float(np.std(cv2.Laplacian(sample, cv2.CV_16S)))
+        return sigma < self._NOISE_SIGMA_THRESHOLD
+
     def binarize(self, image: np.ndarray) -> np.ndarray:
         """
         使用自适应阈值进行二值化
@@ -133,19 +238,22 @@ class ImageProcessor:
         return binary
     
     def preprocess(
-        self, 
-        image: np.ndarray, 
+        self,
+        image: np.ndarray,
         mode: str = "balanced",
-        return_steps: bool = False
+        return_steps: bool = False,
+        need_binary: bool = False
     ) -> dict:
         """
         执行完整的预处理流程
-        
+
         Args:
             image: 输入图像
             mode: 处理模式 (fast/balanced/full)
             return_steps: 是否返回中间步骤的图像
-            
+                (steps中保存的是各阶段输出本身而非拷贝,调用方不应原地修改)
+            need_binary: full模式下是否需要二值化结果
+
         Returns:
             包含处理结果的字典
         """
@@ -159,13 +267,13 @@ class ImageProcessor:
         # 尺寸调整(所有模式)
         processed = self.resize_if_needed(image)
         if return_steps:
-            results["steps"].append(("resized", processed.copy()))
+            results["steps"].append(("resized", processed))
         
         # 灰度转换(所有模式)
         gray = self.to_grayscale(processed)
         results["gray"] = gray
         if return_steps:
-            results["steps"].append(("gray", gray.copy()))
+            results["steps"].append(("gray", gray))
         
         # 根据模式选择处理步骤
         if mode == "fast":
@@ -176,11 +284,11 @@ class ImageProcessor:
             # 均衡模式:标准处理流程
             enhanced = self.enhance_contrast(gray)
             if return_steps:
-                results["steps"].append(("enhanced", enhanced.copy()))
+                results["steps"].append(("enhanced", enhanced))
             
             denoised = self.denoise(enhanced)
             if return_steps:
-                results["steps"].append(("denoised", denoised.copy()))
+                results["steps"].append(("denoised", denoised))
             
             results["processed"] = denoised
         
@@ -188,26 +296,73 @@ class ImageProcessor:
             # 完整模式:完整处理流程
             enhanced = self.enhance_contrast(gray)
             if return_steps:
-                results["steps"].append(("enhanced", enhanced.copy()))
+                results["steps"].append(("enhanced", enhanced))
             
             denoised = self.denoise(enhanced)
             if return_steps:
-                results["steps"].append(("denoised", denoised.copy()))
-            
-            binary = self.binarize(denoised)
-            if return_steps:
-                results["steps"].append(("binary", binary.copy()))
+                results["steps"].append(("denoised", denoised))
             
             results["processed"] = denoised  # 返回去噪图像,二值化图像备用
-            results["binary"] = binary
+
+            # 自适应阈值是O(HxW·k²)的整图扫描,而下游流程只消费去噪图,
+            # 仅在调用方明确需要(或调试查看步骤)时才计算
+            if need_binary or return_steps:
+                binary = self.binarize(denoised)
+                if return_steps:
+                    results["steps"].append(("binary", binary))
+                results["binary"] = binary
         
         else:
             logger.warning(f"Unknown mode: {mode}, using balanced mode")
             results["processed"] = self.enhance_contrast(gray)
         
-        logger.info(f"Preprocessing completed in {mode} mode")
+        logger.debug("Preprocessing completed in {} mode", mode)
         return results
     
+    def preprocess_array(
+        self,
+        image: np.ndarray,
+        mode: str = "balanced"
+    ) -> np.ndarray:
+        """
+        预处理快速路径:只返回最终处理结果数组
+
+        不构建结果字典、不保留original/gray引用,下游流程只拿到
+        需要的数组,全分辨率原图可被尽早释放。增强/去噪输出写入
+        当前线程的乒乓缓冲区(dst=形式,零额外malloc):返回的数组
+        在同一线程下一次preprocess_array调用时会被复用,调用方
+        应在此之前消费完毕
+
+        Args:
+            image: 输入图像
+            mode: 处理模式 (fast/balanced/full)
+
+        Returns:
+            处理后的图像
+        """
+        gray = self.to_grayscale(self.resize_if_needed(image))
+
+        if mode == "fast":
+            processed = gray
+        elif mode in ("balanced", "full"):
+            buf_a, buf_b = self._scratch_pair(gray.shape)
+            with self._clahe_lock:
+                self._clahe.apply(gray, buf_a)
+            # 低噪声图像跳过去噪:一次廉价的噪声估计换掉整图中值滤波遍历
+            if self._low_noise(gray):
+                processed = buf_a
+            elif _fast_ops.HAS_NUMBA and buf_a.flags.c_contiguous:
+                processed = _fast_ops.median3(buf_a, buf_b)
+            else:
+                cv2.medianBlur(buf_a, 3, buf_b)
+                processed = buf_b
+        else:
+            logger.warning(f"Unknown mode: {mode}, using balanced mode")
+            processed = self.enhance_contrast(gray)
+
+        logger.debug("Preprocessing completed in {} mode", mode)
+        return processed
+
     def preprocess_from_file(
         self, 
         image_path: str, 
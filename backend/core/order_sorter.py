@@ -2,7 +2,8 @@
 智能排序引擎
 按人类阅读习惯对识别结果进行排序
 """
-from typing import List, Dict, Any
+import numpy as np
+from typing import List, Dict, Any, Tuple
 from loguru import logger
 
 
@@ -38,6 +39,22 @@ class OrderSorter:
         """获取对象X坐标中心"""
         pos = obj.get("position", {})
         return pos.get("x", 0) + pos.get("width", 0) / 2
+
+    @staticmethod
+    def _centers(objects: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """一次性把所有对象的中心坐标打包为(ys, xs)数组,排序在C层完成"""
+        n = len(objects)
+        ys = np.fromiter(
+            (o.get("position", {}).get("y", 0) + o.get("position", {}).get("height", 0) / 2
+             for o in objects),
+            dtype=np.float32, count=n
+        )
+        xs = np.fromiter(
+            (o.get("position", {}).get("x", 0) + o.get("position", {}).get("width", 0) / 2
+             for o in objects),
+            dtype=np.float32, count=n
+        )
+        return ys, xs
     
     def sort_top_to_bottom(self, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -49,7 +66,10 @@ class OrderSorter:
         Returns:
             排序后的对象列表
         """
-        sorted_objects = sorted(objects, key=lambda obj: self._get_y_center(obj))
+        if not objects:
+            return []
+        ys, _ = self._centers(objects)
+        sorted_objects = [objects[i] for i in np.argsort(ys, kind="stable")]
         logger.debug(f"Sorted {len(objects)} objects top-to-bottom")
         return sorted_objects
     
@@ -63,55 +83,63 @@ class OrderSorter:
         Returns:
             排序后的对象列表
         """
-        sorted_objects = sorted(objects, key=lambda obj: self._get_x_center(obj))
+        if not objects:
+            return []
+        _, xs = self._centers(objects)
+        sorted_objects = [objects[i] for i in np.argsort(xs, kind="stable")]
         logger.debug(f"Sorted {len(objects)} objects left-to-right")
         return sorted_objects
     
-    def sort_reading_order(self, objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _reading_order(self, objects: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        计算阅读顺序的排列索引
+
+        中心坐标打包为数组后分组/排序都在C层完成:行分组采用
+        "间隙"语义——Y排序后只有相邻间距超过容差处才断行,再用
+        一次lexsort得到(行, 行内X)的阅读顺序。相比固定网格分桶,
+        跨桶边界的同一行不会被错误切开
+
+        Returns:
+            排列索引数组,objects[order[0]]为阅读顺序的第一个对象
+        """
+        ys, xs = self._centers(objects)
+
+        order_y = np.argsort(ys, kind="stable")
+        gaps = np.diff(ys[order_y]) > self.row_tolerance
+        row_rank = np.concatenate(([0], np.cumsum(gaps)))
+        row_id = np.empty(len(ys), dtype=np.int64)
+        row_id[order_y] = row_rank
+
+        return np.lexsort((xs, row_id))
+
+    def sort_reading_order(
+        self,
+        objects: List[Dict[str, Any]],
+        number: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         按阅读顺序排序(先按行分组,行内从左到右)
-        
+
         Args:
             objects: 对象列表
-            
+            number: 是否在排序的同一次遍历中写入order序号
+
         Returns:
             排序后的对象列表
         """
         if not objects:
             return []
-        
-        # 先按Y坐标排序
-        y_sorted = sorted(objects, key=lambda obj: self._get_y_center(obj))
-        
-        # 行分组
-        rows = []
-        current_row = [y_sorted[0]]
-        current_y = self._get_y_center(y_sorted[0])
-        
-        for obj in y_sorted[1:]:
-            obj_y = self._get_y_center(obj)
-            
-            # 判断是否在同一行
-            if abs(obj_y - current_y) <= self.row_tolerance:
-                current_row.append(obj)
-            else:
-                # 开始新行
-                rows.append(current_row)
-                current_row = [obj]
-                current_y = obj_y
-        
-        # 添加最后一行
-        if current_row:
-            rows.append(current_row)
-        
-        logger.debug(f"Grouped into {len(rows)} rows")
-        
-        # 每行内按X坐标排序
-        result = []
-        for row in rows:
-            sorted_row = sorted(row, key=lambda obj: self._get_x_center(obj))
-            result.extend(sorted_row)
-        
+
+        if number:
+            # 序号在回填排列的同一次遍历中写入,省去单独的编号遍历
+            result = []
+            for idx, i in enumerate(self._reading_order(objects)):
+                obj = objects[i]
+                obj["order"] = idx + 1
+                result.append(obj)
+        else:
+            result = [objects[i] for i in self._reading_order(objects)]
+
         logger.info(f"Sorted {len(objects)} objects in reading order")
         return result
     
@@ -130,31 +158,37 @@ class OrderSorter:
         return reading_sorted
     
     def sort(
-        self, 
-        objects: List[Dict[str, Any]], 
-        order: str = "reading_order"
+        self,
+        objects: List[Dict[str, Any]],
+        order: str = "reading_order",
+        number: bool = False
     ) -> List[Dict[str, Any]]:
         """
         排序主入口
-        
+
         Args:
             objects: 对象列表
             order: 排序方式 (reading_order/top_to_bottom/left_to_right/grid_order)
-            
+            number: 是否同时写入order序号(替代单独的add_order_numbers调用)
+
         Returns:
             排序后的对象列表
         """
         if not objects:
             return []
-        
+
         if order == "top_to_bottom":
-            return self.sort_top_to_bottom(objects)
+            result = self.sort_top_to_bottom(objects)
         elif order == "left_to_right":
-            return self.sort_left_to_right(objects)
+            result = self.sort_left_to_right(objects)
         elif order == "grid_order":
-            return self.sort_grid_order(objects)
+            result = self.sort_grid_order(objects)
         else:  # reading_order (default)
-            return self.sort_reading_order(objects)
+            return self.sort_reading_order(objects, number=number)
+
+        if number:
+            self.add_order_numbers(result)
+        return result
     
     def add_order_numbers(
         self, 
@@ -0,0 +1,40 @@
+"""
+位置数据的SoA(Structure-of-Arrays)封装
+热路径统一使用连续的NumPy数组,只在API边界转回字典
+"""
+import numpy as np
+from typing import List, Dict, Any
+
+
+class PositionTable:
+    """位置表:把对象列表的position字段打包为(N,4)的xywh数组"""
+
+    __slots__ = ("xywh",)
+
+    def __init__(self, xywh: np.ndarray):
+        self.xywh = xywh
+
+    @classmethod
+    def from_objects(cls, objects: List[Dict[str, Any]]) -> "PositionTable":
+        """从带position字段的对象列表构建位置表"""
+        xywh = np.empty((len(objects), 4), dtype=np.float64)
+        for i, obj in enumerate(objects):
+            pos = obj["position"]
+            xywh[i, 0] = pos["x"]
+            xywh[i, 1] = pos["y"]
+            xywh[i, 2] = pos["width"]
+            xywh[i, 3] = pos["height"]
+        return cls(xywh)
+
+    def __len__(self) -> int:
+        return self.xywh.shape[0]
+
+    @property
+    def centers(self) -> np.ndarray:
+        """所有区域的中心点坐标,(N,2)数组"""
+        return self.xywh[:, :2] + self.xywh[:, 2:] / 2
+
+    def to_dict(self, i: int) -> Dict[str, int]:
+        """把第i行转回API使用的position字典"""
+        x, y, w, h = self.xywh[i]
+        return {"x": int(x), "y": int(y), "width": int(w), "height": int(h)}
@@ -2,8 +2,11 @@
 主处理器
 整合所有引擎,提供完整的图像识别流程
 """
+import os
 import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, Any, List, Optional
 from loguru import logger
 
@@ -73,7 +76,7 @@ class LabelProcessor:
             处理结果字典
         """
         start_time = time.time()
-        logger.info(f"Processing image in {mode} mode, recognition_mode={recognition_mode}")
+        logger.info("Processing image in {} mode, recognition_mode={}", mode, recognition_mode)
         
         result = {
             "success": True,
@@ -86,32 +89,18 @@ class LabelProcessor:
         }
         
         try:
-            # 1. 图像预处理
-            preprocessed = self.image_processor.preprocess(image, mode=mode)
-            processed_img = preprocessed["processed"]
+            # 1. 图像预处理:只有条码流程消费预处理结果,
+            # OCR/AI模式直接使用原图,跳过整套CLAHE+去噪
+            if recognition_mode in ("barcode_only", "barcode_and_ocr"):
+                processed_img = self.image_processor.preprocess_array(image, mode=mode)
             
             # 2. 根据识别模式执行不同的识别流程
             if recognition_mode == "ai":
                 # AI识别模式
                 logger.info("Starting AI recognition...")
                 if not self.ai_recognizer.is_available():
-                    error_msg = "AI识别功能不可用,请检查配置:"
-                    if not self.ai_recognizer.enabled:
-                        error_msg += " AI功能未启用"
-                    elif not self.ai_recognizer.active_model_id:
-                        error_msg += " 未选择激活的模型"
-                    else:
-                        model = self.ai_recognizer.models.get(self.ai_recognizer.active_model_id)
-                        if not model:
-                            error_msg += f" 模型{self.ai_recognizer.active_model_id}不存在"
-                        else:
-                            provider = self.ai_recognizer.providers.get(model.get('provider_id'))
-                            if not provider:
-                                error_msg += f" 提供商{model.get('provider_id')}不存在"
-                            elif not provider.get('enabled'):
-                                error_msg += f" 提供商{model.get('provider_id')}未启用"
-                            elif not provider.get('api_key'):
-                                error_msg += f" 提供商{model.get('provider_id')}缺少API Key"
+                    # 具体原因在配置解析时已缓存,热路径只剩一次可用性检查
+                    error_msg = self.ai_recognizer.get_unavailability_reason()
                     logger.error(error_msg)
                     raise Exception(error_msg)
                 
@@ -145,8 +134,7 @@ class LabelProcessor:
                     })
                 
                 # 排序
-                sorted_objects = self.order_sorter.sort(mixed_objects, order=sort_order)
-                sorted_objects = self.order_sorter.add_order_numbers(sorted_objects)
+                sorted_objects = self.order_sorter.sort(mixed_objects, order=sort_order, number=True)
                 
                 result["results"] = sorted_objects
                 result["ai_raw_response"] = ai_result.get("raw_response")
@@ -154,14 +142,11 @@ class LabelProcessor:
             elif recognition_mode == "barcode_only":
                 # 纯条码识别
                 barcodes = self.barcode_detector.detect(processed_img, try_enhancement=True)
-                logger.info(f"Detected {len(barcodes)} barcodes")
+                logger.info("Detected {} barcodes", len(barcodes))
                 
-                sorted_barcodes = self.order_sorter.sort(barcodes, order=sort_order)
-                sorted_barcodes = self.order_sorter.add_order_numbers(sorted_barcodes)
-                
-                result["results"] = [
+                # 直接构建输出形态的对象再排序编号,省去排序后的二次重打包遍历
+                wrapped = [
                     {
-                        "order": bc["order"],
                         "type": "barcode",
                         "data": {
                             "barcode_data": bc["barcode_data"],
@@ -169,8 +154,11 @@ class LabelProcessor:
                         },
                         "position": bc["position"]
                     }
-                    for bc in sorted_barcodes
+                    for bc in barcodes
                 ]
+                result["results"] = self.order_sorter.sort(
+                    wrapped, order=sort_order, number=True
+                )
             
             elif recognition_mode == "ocr_only":
                 # 纯OCR识别 - 根据mode调整OCR策略
@@ -190,12 +178,9 @@ class LabelProcessor:
                 
                 text_regions = ocr_result["text_regions"]
                 
-                sorted_texts = self.order_sorter.sort(text_regions, order=sort_order)
-                sorted_texts = self.order_sorter.add_order_numbers(sorted_texts)
-                
-                result["results"] = [
+                # 直接构建输出形态的对象再排序编号,省去排序后的二次重打包遍历
+                wrapped = [
                     {
-                        "order": text["order"],
                         "type": "text",
                         "data": {
                             "text": text["text"],
@@ -203,8 +188,11 @@ class LabelProcessor:
                         },
                         "position": text["position"]
                     }
-                    for text in sorted_texts
+                    for text in text_regions
                 ]
+                result["results"] = self.order_sorter.sort(
+                    wrapped, order=sort_order, number=True
+                )
                 result["structured_fields"] = ocr_result["structured_fields"]
                 if mode == "full":
                     result["full_text"] = ocr_result["full_text"]
@@ -213,7 +201,7 @@ class LabelProcessor:
                 # OCR&条码：智能关联处理
                 # 条码识别
                 barcodes = self.barcode_detector.detect(processed_img, try_enhancement=True)
-                logger.info(f"Detected {len(barcodes)} barcodes")
+                logger.info("Detected {} barcodes", len(barcodes))
                 
                 # 根据mode执行不同流程
                 if mode == "fast" or not self.text_recognizer.tesseract_available:
@@ -221,12 +209,8 @@ class LabelProcessor:
                     if not self.text_recognizer.tesseract_available:
                         logger.warning("OCR not available, using barcode only")
                     
-                    sorted_barcodes = self.order_sorter.sort(barcodes, order=sort_order)
-                    sorted_barcodes = self.order_sorter.add_order_numbers(sorted_barcodes)
-                    
-                    result["results"] = [
+                    wrapped = [
                         {
-                            "order": bc["order"],
                             "type": "barcode",
                             "data": {
                                 "barcode_data": bc["barcode_data"],
@@ -234,8 +218,11 @@ class LabelProcessor:
                             },
                             "position": bc["position"]
                         }
-                        for bc in sorted_barcodes
+                        for bc in barcodes
                     ]
+                    result["results"] = self.order_sorter.sort(
+                        wrapped, order=sort_order, number=True
+                    )
                 
                 elif mode == "balanced":
                     # 均衡模式:条码+关键文字(使用原图)
@@ -273,8 +260,7 @@ class LabelProcessor:
                         }
                         mixed_objects.append(obj)
                     
-                    sorted_objects = self.order_sorter.sort(mixed_objects, order=sort_order)
-                    sorted_objects = self.order_sorter.add_order_numbers(sorted_objects)
+                    sorted_objects = self.order_sorter.sort(mixed_objects, order=sort_order, number=True)
                     
                     result["results"] = sorted_objects
                     result["structured_fields"] = ocr_result["structured_fields"]
@@ -314,8 +300,7 @@ class LabelProcessor:
                         }
                         mixed_objects.append(obj)
                     
-                    sorted_objects = self.order_sorter.sort(mixed_objects, order=sort_order)
-                    sorted_objects = self.order_sorter.add_order_numbers(sorted_objects)
+                    sorted_objects = self.order_sorter.sort(mixed_objects, order=sort_order, number=True)
                     
                     result["results"] = sorted_objects
                     result["full_text"] = ocr_result["full_text"]
@@ -327,7 +312,7 @@ class LabelProcessor:
             result["error"] = str(e)
         
         result["process_time"] = int((time.time() - start_time) * 1000)
-        logger.info(f"Processing completed in {result['process_time']}ms")
+        logger.info("Processing completed in {}ms", result["process_time"])
         
         return result
     
@@ -360,3 +345,41 @@ class LabelProcessor:
             }
         
         return self.process_image(image, mode, recognition_mode, sort_order, ocr_mode)
+
+    def process_image_files(
+        self,
+        image_paths: List[str],
+        mode: str = "balanced",
+        recognition_mode: str = "barcode_only",
+        sort_order: str = "top_to_bottom",
+        ocr_mode: str = "local"
+    ) -> List[Dict[str, Any]]:
+        """
+        并发处理多张图像文件
+
+        解码/预处理/条码/OCR的C层代码均释放GIL,
+        线程池即可让批量吞吐随CPU核数扩展
+
+        Args:
+            image_paths: 图像文件路径列表
+            mode: 处理模式
+            recognition_mode: 识别模式
+            sort_order: 排序方式
+            ocr_mode: OCR模式
+
+        Returns:
+            处理结果列表,顺序与输入一致
+        """
+        if not image_paths:
+            return []
+
+        worker = partial(
+            self.process_image_file,
+            mode=mode,
+            recognition_mode=recognition_mode,
+            sort_order=sort_order,
+            ocr_mode=ocr_mode
+        )
+        workers = min(len(image_paths), os.cpu_count() or 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(worker, image_paths))
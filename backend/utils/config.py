@@ -4,10 +4,17 @@
 """
 import yaml
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 from loguru import logger
 
+# 优先使用libyaml的C解析器(快一个数量级),未编译C扩展时退回纯Python实现
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 
 class ConfigManager:
     """配置管理器"""
@@ -25,8 +32,11 @@ class ConfigManager:
         
         logger.info(f"Config directory: {self.config_dir}")
         self._configs: Dict[str, Any] = {}
+        # 每个配置节对应的文件路径与加载时的mtime,供get_section_live做变更检测
+        self._paths: Dict[str, Path] = {}
+        self._mtimes: Dict[str, float] = {}
         self._load_all_configs()
-    
+
     def _load_all_configs(self):
         """加载所有配置文件"""
         config_files = {
@@ -36,46 +46,93 @@ class ConfigManager:
             "ocr": "ocr.yaml",
             "ai": "ai.yaml"
         }
-        
+
+        existing = []
         for name, filename in config_files.items():
             filepath = self.config_dir / filename
-            
+
             # 如果ocr.yaml不存在,尝试加载example文件
             if name == "ocr" and not filepath.exists():
                 filepath = self.config_dir / "ocr.yaml.example"
-            
+
+            # 路径始终记录:启动时缺失、运行期才创建的文件
+            # (如首次保存的ai.yaml)也能被get_section_live感知
+            self._paths[name] = filepath
             if filepath.exists():
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    self._configs[name] = yaml.safe_load(f)
+                existing.append(name)
                 logger.info(f"Loaded config: {filename}")
             else:
                 logger.warning(f"Config file not found: {filename}")
                 self._configs[name] = {}
-    
+
+        # 各文件读取+解析相互独立,线程池并行后启动IO耗时降到最慢的单个文件
+        if existing:
+            with ThreadPoolExecutor(max_workers=len(existing)) as pool:
+                list(pool.map(self._load_file, existing))
+
+        self._rebuild_flat()
+
+    def _rebuild_flat(self):
+        """
+        把嵌套配置摊平为"全限定路径 -> 值"的单层字典
+
+        get的点号路径查询从逐层走嵌套字典(O(深度))变为一次哈希查找,
+        配置加载/重载时重建一次即可
+        """
+        flat: Dict[str, Any] = {}
+
+        def walk(prefix: str, d: Dict[str, Any]):
+            for k, v in d.items():
+                path = f"{prefix}.{k}"
+                flat[path] = v
+                if isinstance(v, dict):
+                    walk(path, v)
+
+        for name, section in self._configs.items():
+            flat[name] = section
+            if isinstance(section, dict):
+                walk(name, section)
+
+        self._flat = flat
+
+    def _load_file(self, name: str):
+        """解析单个配置文件并记录其mtime"""
+        filepath = self._paths[name]
+        # 二进制打开:libyaml内部解码UTF-8,省去Python层的解码开销
+        with open(filepath, 'rb') as f:
+            self._configs[name] = yaml.load(f, Loader=_YamlLoader) or {}
+        self._mtimes[name] = filepath.stat().st_mtime
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         获取配置值,支持点号分隔的路径
         例如: get("server.port") -> 8000
         """
-        parts = key.split('.')
-        config_name = parts[0]
-        
-        if config_name not in self._configs:
-            return default
-        
-        value = self._configs[config_name]
-        for part in parts[1:]:
-            if isinstance(value, dict) and part in value:
-                value = value[part]
-            else:
-                return default
-        
-        return value
+        return self._flat.get(key, default)
     
     def get_section(self, section: str) -> Dict[str, Any]:
         """获取整个配置节"""
         return self._configs.get(section, {})
 
+    def get_section_live(self, section: str) -> Dict[str, Any]:
+        """
+        获取配置节,文件被外部修改时自动重新加载
+
+        只做一次stat对比mtime,未变化时直接返回缓存的字典,
+        读多写少的配置查询接口不必每次请求都重读+重解析YAML
+        """
+        filepath = self._paths.get(section)
+        if filepath is not None:
+            try:
+                mtime = filepath.stat().st_mtime
+            except OSError:
+                return self._configs.get(section, {})
+            if mtime != self._mtimes.get(section):
+                self._load_file(section)
+                self._rebuild_flat()
+                logger.info(f"Reloaded config section: {section}")
+        return self._configs.get(section, {})
+
 
 # 全局配置实例
 config = ConfigManager()
@@ -6,43 +6,120 @@ Windows打包构建脚本
 import subprocess
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED
 import os
-
-def run_command(cmd, cwd=None, shell=True):
-    """执行命令并打印输出"""
+import queue
+import threading
+
+# 加大shutil的复制缓冲区(默认仅几十KB):copy2/copytree/make_archive
+# 内部的读写循环都按该值分块,1MiB可把系统调用次数降一个数量级,
+# 对发布包中几百MB的dist树收益明显
+shutil.COPY_BUFSIZE = 1024 * 1024
+
+# 构建用到的外部命令在导入时解析一次,调用处直接用绝对路径
+_NPM_NAME = 'npm.cmd' if os.name == 'nt' else 'npm'
+NPM = shutil.which(_NPM_NAME) or _NPM_NAME
+
+def _fastcopy(src, dst):
+    """
+    单文件复制:Windows上调用内核级CopyFileW(整个复制在内核完成,
+    ReFS上可走写时复制),失败或非Windows平台退回shutil.copy2
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        if ctypes.windll.kernel32.CopyFileW(str(src), str(dst), False):
+            return dst
+    return shutil.copy2(src, dst)
+
+def run_command(argv, cwd=None):
+    """
+    执行命令(argv列表)并打印输出
+
+    所有命令在编写时即已知,直接以argv方式执行:
+    每次调用省一个cmd.exe/sh解释进程,参数也无需引号转义
+    """
+    display = ' '.join(str(c) for c in argv)
     print(f"\n{'='*60}")
-    print(f"执行命令: {cmd}")
+    print(f"执行命令: {display}")
     print(f"{'='*60}\n")
-    
-    result = subprocess.run(
-        cmd,
-        shell=shell,
+
+    # 子进程输出经管道由后台线程分块转发:直接继承控制台时每行输出
+    # 都是一次同步的控制台写入,PyInstaller/npm的数千行日志会被
+    # 控制台IO拖慢;按块读取整块写出,控制台写入次数降几个数量级
+    proc = subprocess.Popen(
+        argv,
         cwd=cwd,
-        text=True,
-        capture_output=False
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT
     )
-    
-    if result.returncode != 0:
-        print(f"❌ 命令执行失败: {cmd}")
+
+    def _drain():
+        # read1最多做一次底层读取,有多少转发多少,不会为凑满块而阻塞
+        for chunk in iter(lambda: proc.stdout.read1(65536), b''):
+            sys.stdout.write(chunk.decode(errors='replace'))
+            sys.stdout.flush()
+
+    drain = threading.Thread(target=_drain, daemon=True)
+    drain.start()
+    returncode = proc.wait()
+    drain.join()
+
+    if returncode != 0:
+        print(f"❌ 命令执行失败: {display}")
         return False
     return True
 
+def _rmtree_parallel(path):
+    """
+    并行删除目录树
+
+    自底向上遍历,同一目录内的unlink(各自独立的系统调用,
+    Windows上延迟明显)提交线程池并行执行,全部完成后才rmdir该目录
+    """
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for dirpath, _, filenames in os.walk(path, topdown=False, followlinks=False):
+            list(pool.map(
+                os.unlink,
+                (os.path.join(dirpath, name) for name in filenames)
+            ))
+            os.rmdir(dirpath)
+
 def clean_build():
     """清理构建目录"""
     print("\n🧹 清理构建目录...")
-    
-    dirs_to_clean = ['build', 'dist', '__pycache__']
+
+    dirs_to_clean = ['build', '__pycache__']
     for dir_name in dirs_to_clean:
         dir_path = Path(dir_name)
         if dir_path.exists():
             try:
-                shutil.rmtree(dir_path)
+                _rmtree_parallel(dir_path)
                 print(f"  ✓ 已删除: {dir_name}")
             except Exception as e:
                 print(f"  ⚠️  无法删除 {dir_name}: {e}")
                 print(f"  继续构建...")
-    
+
+    # dist/LabelScan只删除后续步骤会重新生成的条目,
+    # config/logs/temp/uploads等用户数据跨构建保留,
+    # 增量构建的清理量从上万文件降到可执行部分
+    dist_app = Path('dist/LabelScan')
+    if dist_app.exists():
+        preserved = {'config', 'logs', 'temp', 'uploads'}
+        for entry in dist_app.iterdir():
+            if entry.name in preserved:
+                continue
+            try:
+                if entry.is_dir():
+                    _rmtree_parallel(entry)
+                else:
+                    entry.unlink()
+                print(f"  ✓ 已删除: dist/LabelScan/{entry.name}")
+            except Exception as e:
+                print(f"  ⚠️  无法删除 {entry.name}: {e}")
+                print(f"  继续构建...")
+
     print("✅ 清理完成")
     return True
 
@@ -55,12 +132,13 @@ def build_frontend():
         print("❌ frontend目录不存在")
         return False
     
-    # 安装依赖
-    if not run_command('npm install', cwd=frontend_dir):
+    # 安装依赖:有锁文件时用npm ci,跳过依赖解析直接按锁文件安装
+    install_cmd = 'ci' if (frontend_dir / 'package-lock.json').exists() else 'install'
+    if not run_command([NPM, install_cmd], cwd=frontend_dir):
         return False
-    
+
     # 构建
-    if not run_command('npm run build', cwd=frontend_dir):
+    if not run_command([NPM, 'run', 'build'], cwd=frontend_dir):
         return False
     
     print("✅ 前端构建完成")
@@ -76,15 +154,40 @@ def install_pyinstaller():
         return True
     except ImportError:
         print("📥 安装PyInstaller...")
-        return run_command(f'{sys.executable} -m pip install pyinstaller')
+        return run_command([sys.executable, '-m', 'pip', 'install', 'pyinstaller'])
+
+# PyInstaller运行期间由后台线程预读的复制阶段源文件(相对路径 -> bytes)
+_preloaded = {}
+_preload_thread = None
+
+def _preload_worker():
+    """预读config/*与README.md到内存,读取与PyInstaller的长任务重叠"""
+    try:
+        config_src = Path('config')
+        if config_src.exists():
+            for path in config_src.rglob('*'):
+                if path.is_file():
+                    _preloaded[path.as_posix()] = path.read_bytes()
+        readme = Path('README.md')
+        if readme.exists():
+            _preloaded['README.md'] = readme.read_bytes()
+    except Exception:
+        # 预读失败退回磁盘复制路径
+        _preloaded.clear()
 
 def build_backend():
     """打包后端"""
+    global _preload_thread
+
     print("\n🔨 打包后端...")
-    
-    if not run_command(f'{sys.executable} -m PyInstaller build.spec --clean'):
+
+    # PyInstaller要跑数十秒到数分钟,期间预读后续复制阶段的源文件
+    _preload_thread = threading.Thread(target=_preload_worker, daemon=True)
+    _preload_thread.start()
+
+    if not run_command([sys.executable, '-m', 'PyInstaller', 'build.spec', '--clean']):
         return False
-    
+
     print("✅ 后端打包完成")
     return True
 
@@ -102,24 +205,64 @@ def copy_dependencies():
     (dist_dir / 'temp').mkdir(exist_ok=True)
     (dist_dir / 'uploads').mkdir(exist_ok=True)
     
+    # 等待预读线程:源文件内容在PyInstaller执行期间已读入内存,
+    # 此阶段只剩目标侧的写入
+    if _preload_thread is not None:
+        _preload_thread.join()
+
+    messages = []
+
     # 复制config目录到外部（供用户编辑）
-    config_src = Path('config')
+    config_entries = {
+        rel: data for rel, data in _preloaded.items()
+        if rel.startswith('config/')
+    }
     config_dst = dist_dir / 'config'
-    if config_src.exists():
+    if config_entries:
         if config_dst.exists():
             shutil.rmtree(config_dst)
-        shutil.copytree(config_src, config_dst)
-        print(f"  ✓ 已复制config目录到: {config_dst}")
-    
+        for rel, data in config_entries.items():
+            dst = dist_dir / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            dst.write_bytes(data)
+        messages.append(f"  ✓ 已复制config目录到: {config_dst}")
+    else:
+        # 预读未命中时退回磁盘复制
+        config_src = Path('config')
+        if config_src.exists():
+            if config_dst.exists():
+                shutil.rmtree(config_dst)
+            shutil.copytree(config_src, config_dst, copy_function=_fastcopy)
+            messages.append(f"  ✓ 已复制config目录到: {config_dst}")
+
     # 复制README
-    readme_src = Path('README.md')
-    if readme_src.exists():
-        shutil.copy2(readme_src, dist_dir / 'README.md')
-        print("  ✓ 已复制README.md")
-    
+    if 'README.md' in _preloaded:
+        (dist_dir / 'README.md').write_bytes(_preloaded['README.md'])
+        messages.append("  ✓ 已复制README.md")
+    elif Path('README.md').exists():
+        _fastcopy(Path('README.md'), dist_dir / 'README.md')
+        messages.append("  ✓ 已复制README.md")
+
+    # 状态行合并为一次stdout写入,免去逐行同步的控制台IO
+    if messages:
+        sys.stdout.write('\n'.join(messages) + '\n')
+
     print("✅ 依赖文件复制完成")
     return True
 
+def _write_raw(path, data):
+    """以原始文件描述符一次性写出整块bytes
+
+    O_BINARY在Windows上关闭CRT的换行转换(其他平台不存在该标志),
+    内容已预先编码好,open/write/close共三次系统调用。
+    """
+    fd = os.open(str(path),
+                 os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0))
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
 def create_launcher():
     """创建启动脚本"""
     print("\n📝 创建启动脚本...")
@@ -152,8 +295,11 @@ if errorlevel 1 (
 )
 """
     
+    # 预先编码成bytes并显式使用CRLF行尾(cmd.exe解析要求),
+    # 整块内容用原始os.open/os.write一次写出:没有TextIOWrapper
+    # 也没有缓冲层,每个文件只有一次write系统调用
     bat_file = dist_dir / 'start.bat'
-    bat_file.write_text(bat_content, encoding='utf-8')
+    _write_raw(bat_file, bat_content.replace('\n', '\r\n').encode('utf-8'))
     print(f"  ✓ 已创建: {bat_file}")
     
     # 创建说明文件
@@ -262,7 +408,7 @@ ocr:
 """
     
     readme_file = dist_dir / 'README_部署说明.txt'
-    readme_file.write_text(readme_content, encoding='utf-8')
+    _write_raw(readme_file, readme_content.encode('utf-8'))
     print(f"  ✓ 已创建: {readme_file}")
     
     print("✅ 启动脚本创建完成")
@@ -282,12 +428,54 @@ def create_installer():
     
     # 创建压缩包
     archive_name = 'LabelScan_Windows_v1.0.0'
-    archive_path = release_dir / archive_name
-    
+    archive_path = release_dir / f'{archive_name}.zip'
+
+    # 发布树的大头是DLL/.pyd等已压缩的二进制,DEFLATE默认级别6
+    # 只能再省1-2%体积却是纯CPU开销;改为直接存储,仅文本类文件
+    # 用低级别DEFLATE,打包耗时降一个数量级
+    text_suffixes = {
+        '.yaml', '.yml', '.txt', '.md', '.bat',
+        '.json', '.html', '.js', '.css'
+    }
+
     try:
         print(f"  正在创建压缩包: {archive_name}.zip")
-        shutil.make_archive(str(archive_path), 'zip', 'dist', 'LabelScan')
-        print(f"✅ 发布包已创建: {archive_path}.zip")
+
+        files = [p for p in sorted(dist_dir.rglob('*')) if not p.is_dir()]
+
+        # 生产者线程顺序预读文件内容,主线程专心写zip:源盘读取与
+        # 目标盘写入相互重叠,总耗时趋近较慢一侧的带宽而非两者之和;
+        # 有界队列限制预读的内存占用
+        buf_queue = queue.Queue(maxsize=4)
+
+        def _producer():
+            try:
+                for path in files:
+                    buf_queue.put((path, path.read_bytes()))
+                buf_queue.put(None)
+            except Exception as exc:
+                buf_queue.put(exc)
+
+        reader = threading.Thread(target=_producer, daemon=True)
+        reader.start()
+
+        with ZipFile(archive_path, 'w', compression=ZIP_STORED) as zf:
+            while True:
+                item = buf_queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                path, data = item
+                info = ZipInfo.from_file(path, path.relative_to('dist'))
+                if path.suffix.lower() in text_suffixes:
+                    zf.writestr(info, data,
+                                compress_type=ZIP_DEFLATED, compresslevel=1)
+                else:
+                    zf.writestr(info, data, compress_type=ZIP_STORED)
+
+        reader.join()
+        print(f"✅ 发布包已创建: {archive_path}")
         return True
     except Exception as e:
         print(f"❌ 创建压缩包失败: {e}")
@@ -310,25 +498,34 @@ def main():
     
     print(f"✓ Python版本: {sys.version}")
     
-    # 构建流程
-    steps = [
-        ("清理构建目录", clean_build),
-        ("构建前端", build_frontend),
-        ("安装PyInstaller", install_pyinstaller),
-        ("打包后端", build_backend),
-        ("复制依赖文件", copy_dependencies),
-        ("创建启动脚本", create_launcher),
-        ("创建发布包", create_installer),
+    # 构建流程按依赖关系分阶段:同一阶段内的步骤互不依赖,
+    # 并行执行(npm/pip大部分时间在网络和磁盘上),阶段之间仍严格串行
+    stages = [
+        [("清理构建目录", clean_build)],
+        [("构建前端", build_frontend), ("安装PyInstaller", install_pyinstaller)],
+        [("打包后端", build_backend)],
+        [("复制依赖文件", copy_dependencies), ("创建启动脚本", create_launcher)],
+        [("创建发布包", create_installer)],
     ]
-    
-    for step_name, step_func in steps:
+
+    for stage in stages:
         print(f"\n{'='*60}")
-        print(f"步骤: {step_name}")
+        print(f"步骤: {' + '.join(name for name, _ in stage)}")
         print(f"{'='*60}")
-        
-        if not step_func():
-            print(f"\n❌ 构建失败于: {step_name}")
-            return False
+
+        if len(stage) == 1:
+            step_name, step_func = stage[0]
+            if not step_func():
+                print(f"\n❌ 构建失败于: {step_name}")
+                return False
+        else:
+            # 并行步骤的控制台输出可能交错,但各步骤的✓/❌行仍可辨认
+            with ThreadPoolExecutor(max_workers=len(stage)) as pool:
+                futures = [(name, pool.submit(func)) for name, func in stage]
+                failed = [name for name, future in futures if not future.result()]
+            if failed:
+                print(f"\n❌ 构建失败于: {', '.join(failed)}")
+                return False
     
     print(f"\n{'='*60}")
     print("🎉 构建完成!")
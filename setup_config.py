@@ -3,9 +3,8 @@ Windows部署配置检查和设置工具
 """
 
 import sys
-import subprocess
+from importlib.util import find_spec
 from pathlib import Path
-import yaml
 import shutil
 
 def check_python_version():
@@ -29,26 +28,18 @@ def check_tesseract():
         r"D:\Program Files\Tesseract-OCR\tesseract.exe",
     ]
     
-    # 尝试从PATH中查找
-    try:
-        result = subprocess.run(
-            ['tesseract', '--version'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            print("✅ Tesseract OCR已安装(在PATH中)")
-            return 'tesseract'
-    except:
-        pass
-    
+    # 从PATH中查找:shutil.which进程内扫描目录即可,
+    # 不必为探测存在性付出一次子进程spawn(Windows上约百毫秒)
+    if shutil.which('tesseract'):
+        print("✅ Tesseract OCR已安装(在PATH中)")
+        return 'tesseract'
+
     # 检查常见安装路径
-    for path in common_paths:
-        if Path(path).exists():
-            print(f"✅ Tesseract OCR已安装: {path}")
-            return path
-    
+    found = next((p for p in common_paths if Path(p).exists()), None)
+    if found:
+        print(f"✅ Tesseract OCR已安装: {found}")
+        return found
+
     print("⚠️  未检测到Tesseract OCR")
     print("   请从以下地址下载并安装:")
     print("   https://github.com/UB-Mannheim/tesseract/wiki")
@@ -57,7 +48,17 @@ def check_tesseract():
 def update_config(tesseract_path):
     """更新配置文件"""
     print("\n更新配置文件...")
-    
+
+    # yaml只有这里用到,延迟到真正需要更新配置时再导入,
+    # 纯检查路径(未找到Tesseract)完全不付yaml的导入开销
+    import yaml
+
+    # 优先使用libyaml的C实现(解析/输出快5-10倍),未编译C扩展时退回纯Python
+    try:
+        from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
     config_dir = Path('config')
     if not config_dir.exists():
         print("❌ config目录不存在")
@@ -70,22 +71,30 @@ def update_config(tesseract_path):
         system_config = {}
     else:
         with open(system_config_path, 'r', encoding='utf-8') as f:
-            system_config = yaml.safe_load(f) or {}
-    
+            system_config = yaml.load(f, Loader=_YamlLoader) or {}
+
     # 设置Tesseract路径
     if tesseract_path:
+        # Windows路径需要转义反斜杠
+        escaped_path = str(tesseract_path).replace('\\', '\\\\')
+
+        # 路径未变化时不重写文件:幂等重跑零开销
+        current = system_config.get('ocr', {}).get('local', {}).get('tesseract_cmd')
+        if current == escaped_path:
+            print(f"✅ Tesseract路径已是最新: {tesseract_path}")
+            return True
+
         if 'ocr' not in system_config:
             system_config['ocr'] = {}
         if 'local' not in system_config['ocr']:
             system_config['ocr']['local'] = {}
-        
-        # Windows路径需要转义反斜杠
-        escaped_path = str(tesseract_path).replace('\\', '\\\\')
+
         system_config['ocr']['local']['tesseract_cmd'] = escaped_path
-        
+
         with open(system_config_path, 'w', encoding='utf-8') as f:
-            yaml.dump(system_config, f, allow_unicode=True, default_flow_style=False)
-        
+            yaml.dump(system_config, f, Dumper=_YamlDumper,
+                      allow_unicode=True, default_flow_style=False)
+
         print(f"✅ 已配置Tesseract路径: {tesseract_path}")
     
     return True
@@ -107,14 +116,27 @@ def check_dependencies():
         'loguru'
     ]
     
+    # 包名与导入名不一致的映射
+    import_names = {
+        'opencv-python': 'cv2',
+        'Pillow': 'PIL',
+        'pyyaml': 'yaml',
+    }
+
     missing = []
+    lines = []
     for package in required:
-        try:
-            __import__(package.replace('-', '_'))
-            print(f"  ✓ {package}")
-        except ImportError:
-            print(f"  ✗ {package}")
+        module = import_names.get(package, package.replace('-', '_'))
+        # find_spec只在sys.path上查找模块文件,不执行模块初始化;
+        # 真正import cv2/numpy等要几百毫秒和数十MB内存,纯属浪费
+        if find_spec(module) is not None:
+            lines.append(f"  ✓ {package}")
+        else:
+            lines.append(f"  ✗ {package}")
             missing.append(package)
+
+    # 状态行合并为一次stdout写入,免去逐行同步的控制台IO
+    sys.stdout.write('\n'.join(lines) + '\n')
     
     if missing:
         print(f"\n⚠️  缺少以下依赖: {', '.join(missing)}")
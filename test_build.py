@@ -3,9 +3,13 @@
 用于检查构建后的程序是否正常工作
 """
 
+import http.client
+import socket
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import urlparse
 import subprocess
 import requests
 from threading import Thread
@@ -31,8 +35,26 @@ def wait_for_server(url, timeout=30):
     """等待服务器启动"""
     print(f"等待服务器启动 ({url})...")
     start_time = time.time()
-    
+
+    parsed = urlparse(url)
+    host = parsed.hostname or 'localhost'
+    port = parsed.port or 80
+
+    # 先用轻量socket探测端口再发HTTP请求:每次requests.get都要新建
+    # 连接池并承受2秒的连接超时,而socket探测在端口打开后的几十毫秒
+    # 内即可感知;探测间隔指数退避,上限0.5秒
+    attempt = 0
     while time.time() - start_time < timeout:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                pass
+        except OSError:
+            time.sleep(min(0.05 * (2 ** attempt), 0.5))
+            attempt += 1
+            print(".", end="", flush=True)
+            continue
+
+        # 端口已打开,确认HTTP服务返回200
         try:
             response = requests.get(url, timeout=2)
             if response.status_code == 200:
@@ -40,9 +62,8 @@ def wait_for_server(url, timeout=30):
                 return True
         except requests.exceptions.RequestException:
             pass
-        time.sleep(1)
-        print(".", end="", flush=True)
-    
+        time.sleep(0.2)
+
     print("\n❌ 服务器启动超时")
     return False
 
@@ -56,22 +77,41 @@ def test_api_endpoints(base_url):
         ("获取配置", "/api/v1/config"),
         ("AI配置", "/api/v1/ai/config"),
     ]
-    
-    results = []
-    for name, endpoint in tests:
-        url = f"{base_url}{endpoint}"
+
+    parsed = urlparse(base_url)
+    host = parsed.hostname or 'localhost'
+    port = parsed.port or 80
+
+    def _probe(endpoint):
+        """单端点GET探测,返回(状态码, 异常)"""
+        conn = http.client.HTTPConnection(host, port, timeout=5)
         try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
+            conn.request('GET', endpoint)
+            response = conn.getresponse()
+            response.read()
+            return response.status, None
+        except Exception as e:
+            return None, e
+        finally:
+            conn.close()
+
+    # 4个只读端点相互独立,并行探测后总耗时约等于最慢的单个请求;
+    # 按固定顺序收集,输出顺序与tests列表一致
+    results = []
+    with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        futures = [(name, ep, pool.submit(_probe, ep)) for name, ep in tests]
+        for name, endpoint, future in futures:
+            status, error = future.result()
+            if status == 200:
                 print(f"  ✓ {name}: {endpoint}")
                 results.append(True)
+            elif error is not None:
+                print(f"  ✗ {name}: {endpoint} (错误: {error})")
+                results.append(False)
             else:
-                print(f"  ✗ {name}: {endpoint} (状态码: {response.status_code})")
+                print(f"  ✗ {name}: {endpoint} (状态码: {status})")
                 results.append(False)
-        except Exception as e:
-            print(f"  ✗ {name}: {endpoint} (错误: {e})")
-            results.append(False)
-    
+
     return all(results)
 
 def check_static_files(dist_dir):
@@ -88,16 +128,21 @@ def check_static_files(dist_dir):
         'start.bat',
     ]
     
-    results = []
-    for file_path in required_files:
-        full_path = dist_dir / file_path
-        if full_path.exists():
-            print(f"  ✓ {file_path}")
-            results.append(True)
-        else:
-            print(f"  ✗ {file_path} (不存在)")
-            results.append(False)
-    
+    # 一次目录遍历构建现存文件集合,逐文件的stat系统调用
+    # 变为内存中的集合查找,检查数量再多也只扫一遍目录
+    present = {
+        p.relative_to(dist_dir).as_posix()
+        for p in dist_dir.rglob('*')
+        if p.is_file()
+    }
+    results = [file_path in present for file_path in required_files]
+
+    # 状态行合并为一次stdout写入,免去逐行同步的控制台IO
+    sys.stdout.write('\n'.join(
+        f"  ✓ {file_path}" if ok else f"  ✗ {file_path} (不存在)"
+        for file_path, ok in zip(required_files, results)
+    ) + '\n')
+
     return all(results)
 
 def main():